@@ -0,0 +1,129 @@
+"""Compare sequential and parallel loading of synthetic Irrigation_Outputs folders.
+
+Usage::
+
+    python benchmarks/bench_loader.py [--sizes 100,1000,10000] [--workers 8] [--repeat 3]
+
+Pass ``--latency-ms`` to add a per-file delay that approximates network-mounted
+output storage, where the parallel loader pays off most.
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import outputs  # noqa: E402
+from outputs import JSON_DECODER, load_files, scan_folder, select_source  # noqa: E402
+
+SAMPLE_RECORD = {
+    "block": "D2_Bay_1",
+    "date": "2025-05-17",
+    "ndvi": 0.6437745690345764,
+    "ndvi_avg": 0.6437745690345764,
+    "ndvi_p80": None,
+    "evi": 0.4836866557598114,
+    "gndvi": 0.6243584752082825,
+    "ndre": 0.44006577134132385,
+    "kc": 0.805,
+    "eto": 0.174,
+    "etc": 0.14,
+    "efficiency": 0.95,
+    "irrigation_type": "unknown",
+    "application_rate_mm_hr": 10,
+    "irrigation_mm": 0.15,
+    "irrigation_minutes": 0.9,
+    "confidence_score": 100,
+    "rain_mm": 0,
+    "fallback_used": False,
+    "crop": "unknown",
+    "crop_stage": "unspecified",
+    "features": {},
+    "notes": [],
+    "priority_score": 0.14,
+    "why_this_recommendation": "ETo = 0.174 mm | NDVI change: 0.0%",
+    "soil_type": "loam",
+    "raw_mm_used": 55,
+    "split_recommended": False,
+    "split_into": [],
+    "ndvi_change": 0.0,
+    "stress_flag": False,
+    "ndvi_display_mode": "average",
+    "kc_components": {
+        "weights": {"ndvi": 1, "evi": 0, "gndvi": 0, "ndre": 0},
+        "raw_kc": 0.644,
+        "final_kc": 0.805,
+    },
+    "actual_irrigation_mm": None,
+    "irrigation_gap": None,
+    "soil_capacity_flag": False,
+    "leaching_risk": False,
+    "stress_risk": False,
+    "note_flags": [],
+    "note_effects": [],
+}
+
+
+def write_folder(folder, blocks):
+    os.makedirs(folder, exist_ok=True)
+    for i in range(1, blocks + 1):
+        record = dict(SAMPLE_RECORD, block=f"D2_Bay_{i}")
+        with open(os.path.join(folder, f"D2_Bay_{i}_irrigation.json"), "w") as f:
+            json.dump(record, f, indent=2)
+
+
+def simulate_latency(latency_ms):
+    read_file = outputs.read_file
+
+    def slow_read_file(folder, filename):
+        time.sleep(latency_ms / 1000)
+        return read_file(folder, filename)
+
+    outputs.read_file = slow_read_file
+
+
+def time_load(folder, workers, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        _, filenames = select_source(scan_folder(folder))
+        outcomes = load_files(folder, filenames, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert len(outcomes) == len(filenames)
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Simulated per-file open latency")
+    parser.add_argument("--dir", help="Where to create the synthetic folders (default: a temp dir)")
+    args = parser.parse_args()
+
+    if args.latency_ms:
+        simulate_latency(args.latency_ms)
+
+    root = tempfile.mkdtemp(prefix="irrixa-bench-", dir=args.dir)
+    try:
+        print(f"decoder={JSON_DECODER} workers={args.workers} repeat={args.repeat} latency_ms={args.latency_ms}")
+        print(f"{'files':>8} {'sequential ms':>14} {'parallel ms':>12} {'speedup':>8}")
+        for size in (int(value) for value in args.sizes.split(",")):
+            folder = os.path.join(root, str(size))
+            write_folder(folder, size)
+            sequential = time_load(folder, 1, args.repeat)
+            parallel = time_load(folder, args.workers, args.repeat)
+            print(f"{size:>8} {sequential * 1000:>14.1f} {parallel * 1000:>12.1f} {sequential / parallel:>7.2f}x")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
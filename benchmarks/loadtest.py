@@ -0,0 +1,175 @@
+"""Reproducible local load test against a synthetic Irrigation_Outputs tree.
+
+Generates ``--dates`` folders of ``--blocks`` block files, starts the server
+(gunicorn via ``wsgi:app`` by default, or the Flask dev server), drives each
+scenario with ``--concurrency`` keep-alive clients for ``--duration`` seconds and
+reports requests/s with p50/p99 latency.
+
+Usage::
+
+    python benchmarks/loadtest.py [--dates 7] [--blocks 500] [--concurrency 16] [--duration 10]
+"""
+
+import argparse
+import http.client
+import json
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from bench_loader import SAMPLE_RECORD
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = [
+    ("latest", "/api/irrigation-results", {}),
+    ("latest-gzip", "/api/irrigation-results", {"Accept-Encoding": "gzip"}),
+    ("filtered", "/api/irrigation-results?fields=block,irrigation_minutes,stress_flag&sort=-priority_score&limit=50", {}),
+    ("range", "/api/irrigation-results?block=D2_Bay_1&fields=date,ndvi,etc,irrigation_mm", {}),
+    ("summary", "/api/irrigation-summary", {}),
+]
+
+
+def generate_tree(root, dates, blocks):
+    start = date(2025, 5, 1)
+    for offset in range(dates):
+        day = (start + timedelta(days=offset)).isoformat()
+        folder = os.path.join(root, day)
+        os.makedirs(folder)
+        records = []
+        for i in range(1, blocks + 1):
+            record = dict(SAMPLE_RECORD, block=f"D2_Bay_{i}", date=day, priority_score=round(i / blocks, 3))
+            records.append(record)
+            with open(os.path.join(folder, f"D2_Bay_{i}_irrigation.json"), "w") as f:
+                json.dump(record, f, indent=2)
+        # The pipeline writes the aggregate last.
+        with open(os.path.join(folder, "block_irrigation.json"), "w") as f:
+            json.dump(records, f, indent=2)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(kind, port, env):
+    if kind == "gunicorn":
+        command = [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}", "wsgi:app"]
+    else:
+        command = [sys.executable, "server.py"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with {process.returncode}")
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=1)
+            conn.request("GET", "/metrics")
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("Server did not become ready")
+
+
+def run_scenario(port, path, headers, concurrency, duration):
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+        local = []
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                conn.request("GET", path, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+                ok = False
+            if ok:
+                local.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    errors[0] += 1
+        conn.close()
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies), errors[0], elapsed, latencies
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return float("nan")
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dates", type=int, default=7)
+    parser.add_argument("--blocks", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--server", choices=("gunicorn", "dev"), default="gunicorn")
+    parser.add_argument("--workers", type=int, help="gunicorn workers (WEB_CONCURRENCY)")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="irrixa-loadtest-")
+    process = None
+    try:
+        outputs_dir = os.path.join(tmp, "Irrigation_Outputs")
+        generate_tree(outputs_dir, args.dates, args.blocks)
+        port = free_port()
+        env = dict(
+            os.environ,
+            PORT=str(port),
+            IRRIXA_OUTPUTS_DIR=outputs_dir,
+            IRRIXA_INDEX_PATH=os.path.join(tmp, "index.sqlite3"),
+            IRRIXA_ACCESS_LOG="",
+        )
+        if args.workers:
+            env["WEB_CONCURRENCY"] = str(args.workers)
+        process = start_server(args.server, port, env)
+
+        print(
+            f"server={args.server} workers={env.get('WEB_CONCURRENCY', 'default')} dates={args.dates}"
+            f" blocks={args.blocks} concurrency={args.concurrency} duration={args.duration}s"
+        )
+        print(f"{'scenario':<14} {'requests':>9} {'errors':>7} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+        for name, path, headers in SCENARIOS:
+            count, errors, elapsed, latencies = run_scenario(port, path, headers, args.concurrency, args.duration)
+            print(
+                f"{name:<14} {count:>9} {errors:>7} {count / elapsed:>9.1f}"
+                f" {percentile(latencies, 0.50) * 1000:>8.2f} {percentile(latencies, 0.99) * 1000:>8.2f}"
+            )
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=30)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Gunicorn settings for production; every value can be overridden from the environment."""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+# Workers share one socket, so a scrape of /metrics reaches an arbitrary one.
+# prometheus_client's multiprocess mode keeps every worker's samples in this
+# directory and /metrics aggregates them. It must be set before the app (and
+# prometheus_client) is imported, and is wiped so old runs do not leak in.
+_metrics_dir = os.environ.setdefault(
+    "PROMETHEUS_MULTIPROC_DIR", os.path.join(tempfile.gettempdir(), f"irrixa-metrics-{os.getpid()}")
+)
+shutil.rmtree(_metrics_dir, ignore_errors=True)
+os.makedirs(_metrics_dir)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("WEB_CONCURRENCY", min(multiprocessing.cpu_count() * 2 + 1, 8)))
+
+# An SSE client (/api/irrigation-results/stream) holds its connection, and with
+# gthread a worker thread, for as long as the dashboard stays open. So a gthread
+# worker holds at most IRRIXA_SSE_MAX_CLIENTS of them, by default half its
+# threads (4 of 8), keeping the rest free for ordinary requests; the whole server
+# holds workers * IRRIXA_SSE_MAX_CLIENTS and answers 503 with Retry-After beyond
+# that. For more dashboards, run a second instance with IRRIXA_WORKER_CLASS=gevent
+# and route only the stream path to it. A gevent worker holds 900 SSE clients by
+# default (IRRIXA_WORKER_CONNECTIONS, 1000, less 100 kept for other requests),
+# but loads files and queries SQLite without real threads, so keep the other
+# routes on the gthread instance.
+worker_class = os.environ.get("IRRIXA_WORKER_CLASS", "gthread")
+threads = int(os.environ.get("IRRIXA_THREADS", 8))
+worker_connections = int(os.environ.get("IRRIXA_WORKER_CONNECTIONS", 1000))
+if worker_class == "gevent":
+    os.environ.setdefault("IRRIXA_SSE_MAX_CLIENTS", str(worker_connections - 100))
+    # gevent patches the standard library when a worker starts; locks created
+    # by a preloaded app would be the unpatched kind.
+    preload_app = False
+else:
+    os.environ.setdefault("IRRIXA_SSE_MAX_CLIENTS", str(max(1, threads // 2)))
+    preload_app = True
+keepalive = 5
+graceful_timeout = 30
+timeout = 60
+accesslog = os.environ.get("IRRIXA_ACCESS_LOG", "-") or None  # Empty disables it
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
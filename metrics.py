@@ -0,0 +1,77 @@
+"""Request and cache metrics in the Prometheus text format.
+
+Under gunicorn every worker is a separate process behind one socket, so a
+scrape reaches an arbitrary worker. When ``PROMETHEUS_MULTIPROC_DIR`` is set
+(gunicorn.conf.py does this) prometheus_client's multiprocess mode keeps the
+samples in files shared by all workers and ``render`` aggregates them, so each
+scrape reports the whole server. Without it the metrics cover this process.
+
+The cache hit ratio is ``rate(irrixa_cache_lookups_total{result="hit"}[5m]) /
+rate(irrixa_cache_lookups_total[5m])``; only lookups made to answer results
+requests are counted, not the SSE watcher's polls or internal lookups.
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+FILES_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+CONTENT_TYPE = CONTENT_TYPE_LATEST
+
+
+class RequestMetrics:
+    def __init__(self, registry=None):
+        kwargs = {"registry": registry} if registry is not None else {}
+        self.requests = Counter(
+            "irrixa_requests", "Requests served", ["endpoint", "method", "status"], **kwargs
+        )
+        self.latency = Histogram(
+            "irrixa_request_duration_seconds", "Request latency", ["endpoint"], buckets=LATENCY_BUCKETS, **kwargs
+        )
+        self.size = Histogram(
+            "irrixa_response_size_bytes", "Response body size", ["endpoint"], buckets=SIZE_BUCKETS, **kwargs
+        )
+        self.files = Histogram(
+            "irrixa_files_read_per_request", "Output files read per request", ["endpoint"], buckets=FILES_BUCKETS,
+            **kwargs
+        )
+        self.cache_lookups = Counter("irrixa_cache_lookups", "Results cache lookups", ["result"], **kwargs)
+        self.cache_evictions = Counter("irrixa_cache_evictions", "Results cache evictions", **kwargs)
+        self.cache_files_parsed = Counter("irrixa_cache_files_parsed", "Output files parsed by the cache", **kwargs)
+        self._registry = registry
+
+    def observe(self, endpoint, method, status, seconds, size, files_read):
+        self.requests.labels(endpoint, method, str(status)).inc()
+        self.latency.labels(endpoint).observe(seconds)
+        if size is not None:
+            self.size.labels(endpoint).observe(size)
+        self.files.labels(endpoint).observe(files_read)
+
+    def observe_cache(self, result, files_parsed=0, evictions=0):
+        """Cache callback: ``result`` is "hit", "miss" or None for an uncounted lookup."""
+        if result is not None:
+            self.cache_lookups.labels(result).inc()
+        if files_parsed:
+            self.cache_files_parsed.inc(files_parsed)
+        if evictions:
+            self.cache_evictions.inc(evictions)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = self._registry or REGISTRY
+        return generate_latest(registry)
@@ -0,0 +1,277 @@
+"""Layout-aware loading of an ``Irrigation_Outputs/<date>/`` folder.
+
+The pipeline writes one ``<block>_irrigation.json`` per block plus an aggregate
+``block_irrigation.json`` repeating every per-block record. Only one of the two
+sources is read per folder.
+"""
+
+import csv
+import itertools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the stdlib decoder is the fallback
+    orjson = None
+
+try:
+    import ijson
+except ImportError:  # ijson is optional; streaming then reads the per-block files
+    ijson = None
+
+logger = logging.getLogger(__name__)
+
+JSON_DECODER = "orjson" if orjson is not None else "json"
+_loads = orjson.loads if orjson is not None else json.loads
+
+AGGREGATE_FILE = "block_irrigation.json"
+SUMMARY_CSV = "irrixa_summary.csv"
+BLOCK_SUFFIX = "_irrigation.json"
+
+SOURCE_AGGREGATE = "aggregate"
+SOURCE_BLOCKS = "blocks"
+
+STATUS_OK = "ok"
+STATUS_SKIPPED = "skipped"
+STATUS_MALFORMED = "malformed"
+
+# Output storage is often network-mounted, where per-file open/read latency
+# dominates; a bounded pool overlaps those waits.
+LOADER_WORKERS = int(os.environ.get("IRRIXA_LOADER_WORKERS", 8))
+
+# Result of reading one output file; ``records`` is None when it was malformed.
+FileOutcome = namedtuple("FileOutcome", "filename status records error")
+
+# Records per chunk when the aggregate is parsed incrementally.
+STREAM_CHUNK_SIZE = 200
+
+_executors = {}  # pool size -> ThreadPoolExecutor, for this process
+_executor_pid = None
+_executor_lock = threading.Lock()
+_reads = threading.local()
+_latest = {}  # outputs_dir -> (mtime_ns, newest date)
+
+DATE_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+# Directory mtimes closer to now than this are not trusted to cache a listing.
+RACY_MTIME_NS = 2 * 10**9
+
+
+def list_dates(outputs_dir):
+    """Return the dated output folders in ``outputs_dir``, oldest first."""
+    try:
+        names = os.listdir(outputs_dir)
+    except FileNotFoundError:
+        return []
+    return sorted(name for name in names if DATE_RE.match(name) and os.path.isdir(os.path.join(outputs_dir, name)))
+
+
+def latest_date(outputs_dir):
+    """Return the newest dated folder in ``outputs_dir`` (None if there is none).
+
+    The answer is reused until the directory's mtime changes, so a default
+    poll costs one stat instead of a stat per dated folder.
+    """
+    try:
+        mtime_ns = os.stat(outputs_dir).st_mtime_ns
+    except FileNotFoundError:
+        return None
+    cached = _latest.get(outputs_dir)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    dates = list_dates(outputs_dir)
+    latest = dates[-1] if dates else None
+    # A change within the mtime granularity could go unnoticed, so a
+    # directory modified just now is listed again next time.
+    if time.time_ns() - mtime_ns > RACY_MTIME_NS:
+        _latest[outputs_dir] = (mtime_ns, latest)
+    return latest
+
+
+def scan_folder(folder):
+    """Return ``{filename: (mtime_ns, size)}`` for every irrigation file in ``folder``."""
+    stats = {}
+    try:
+        with os.scandir(folder) as it:
+            for item in it:
+                if item.name.endswith(BLOCK_SUFFIX) and item.is_file():
+                    st = item.stat()
+                    stats[item.name] = (st.st_mtime_ns, st.st_size)
+    except FileNotFoundError:
+        pass
+    return stats
+
+
+def select_source(stats):
+    """Pick which files to read, returning ``(source, filenames)``.
+
+    The aggregate file is used when it is at least as new as every per-block
+    file; otherwise the per-block files are read.
+    """
+    blocks = block_filenames(stats)
+    aggregate = stats.get(AGGREGATE_FILE)
+    if aggregate is not None:
+        newest_block = max((stats[name][0] for name in blocks), default=0)
+        if aggregate[0] >= newest_block:
+            return SOURCE_AGGREGATE, [AGGREGATE_FILE]
+    return SOURCE_BLOCKS, blocks
+
+
+def block_filenames(stats):
+    return sorted(name for name in stats if name != AGGREGATE_FILE)
+
+
+def load_source(stats, load):
+    """Read the preferred source of a folder, returning ``(source, outcomes)``.
+
+    ``load(filenames)`` returns one FileOutcome per filename. A malformed
+    aggregate falls back to the per-block files.
+    """
+    source, filenames = select_source(stats)
+    outcomes = load(filenames)
+    if source == SOURCE_AGGREGATE and outcomes[0].records is None:
+        source = SOURCE_BLOCKS
+        outcomes = load(block_filenames(stats))
+    return source, outcomes
+
+
+def read_file(folder, filename):
+    """Parse one output file into a FileOutcome."""
+    try:
+        with open(os.path.join(folder, filename), "rb") as f:
+            data = _loads(f.read())
+    except Exception as e:
+        logger.warning("Skipped %s: %s", filename, e)
+        return FileOutcome(filename, STATUS_MALFORMED, None, f"{type(e).__name__}: {e}")
+    if isinstance(data, list):
+        return FileOutcome(filename, STATUS_OK, [record for record in data if isinstance(record, dict)], None)
+    if isinstance(data, dict):
+        return FileOutcome(filename, STATUS_OK, [data], None)
+    return FileOutcome(filename, STATUS_SKIPPED, [], "top-level JSON is not an object or array")
+
+
+def load_files(folder, filenames, workers=None):
+    """Read ``filenames`` concurrently, returning their FileOutcomes in the same order."""
+    workers = LOADER_WORKERS if workers is None else workers
+    _count_reads(len(filenames))
+    if workers <= 1 or len(filenames) <= 1:
+        return [read_file(folder, filename) for filename in filenames]
+    # One task per worker rather than per file keeps the pool overhead out of
+    # the per-file cost.
+    batches = [filenames[i::workers] for i in range(min(workers, len(filenames)))]
+    results = _get_executor(workers).map(lambda batch: [read_file(folder, filename) for filename in batch], batches)
+    by_name = {outcome.filename: outcome for batch in results for outcome in batch}
+    return [by_name[filename] for filename in filenames]
+
+
+def load_folder(folder, stats):
+    """Read the preferred source of ``folder``, returning ``(source, outcomes)``."""
+    return load_source(stats, lambda filenames: load_files(folder, filenames))
+
+
+def files_read():
+    """Number of output files read on behalf of the current thread so far."""
+    return getattr(_reads, "count", 0)
+
+
+def _count_reads(count):
+    _reads.count = files_read() + count
+
+
+def _get_executor(workers):
+    global _executor_pid
+    with _executor_lock:
+        # Pool threads do not survive a fork (e.g. a preloading WSGI server),
+        # so each process gets its own pools.
+        if _executor_pid != os.getpid():
+            _executors.clear()
+            _executor_pid = os.getpid()
+        executor = _executors.get(workers)
+        if executor is None:
+            executor = _executors[workers] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="irrixa-loader")
+        return executor
+
+
+def read_summary_csv(folder):
+    """Return the rows of the pipeline's ``irrixa_summary.csv`` (values as strings), or []."""
+    try:
+        with open(os.path.join(folder, SUMMARY_CSV), newline="") as f:
+            return list(csv.DictReader(f))
+    except FileNotFoundError:
+        return []
+
+
+def record_key(record):
+    return record.get("block"), record.get("date")
+
+
+def merge_records(record_lists):
+    """Flatten ``record_lists``, keeping the last record seen for each ``(block, date)``."""
+    merged = {}
+    for records in record_lists:
+        for record in records:
+            key = record_key(record)
+            merged.pop(key, None)
+            merged[key] = record
+    return list(merged.values())
+
+
+def iter_folder_chunks(folder):
+    """Yield the records of ``folder`` in small lists, skipping duplicate ``(block, date)`` keys.
+
+    Unlike the cache this never holds more than one file's records (or, with
+    ijson, one chunk of the aggregate), so memory and time to first byte stay
+    flat however large the folder is.
+    """
+    stats = scan_folder(folder)
+    source, _ = select_source(stats)
+    blocks = block_filenames(stats)
+    seen = set()
+    # Without an incremental parser the aggregate would be parsed whole before
+    # the first record goes out, so the per-block files are preferred.
+    if source == SOURCE_AGGREGATE and (ijson is not None or not blocks):
+        try:
+            yield from _iter_aggregate(folder, seen)
+            return
+        except Exception as e:
+            # Records already sent are in ``seen``; the block files supply the rest.
+            logger.warning("Skipped %s: %s", AGGREGATE_FILE, e)
+    for filename in blocks:
+        outcome = read_file(folder, filename)
+        _count_reads(1)
+        if outcome.records:
+            yield _unseen(outcome.records, seen)
+
+
+def _iter_aggregate(folder, seen):
+    _count_reads(1)
+    if ijson is None:
+        outcome = read_file(folder, AGGREGATE_FILE)
+        if outcome.records is None:
+            raise ValueError(outcome.error)
+        yield _unseen(outcome.records, seen)
+        return
+    with open(os.path.join(folder, AGGREGATE_FILE), "rb") as f:
+        items = (item for item in ijson.items(f, "item", use_float=True) if isinstance(item, dict))
+        while True:
+            chunk = list(itertools.islice(items, STREAM_CHUNK_SIZE))
+            if not chunk:
+                return
+            yield _unseen(chunk, seen)
+
+
+def _unseen(records, seen):
+    chunk = []
+    for record in records:
+        key = record_key(record)
+        if key not in seen:
+            seen.add(key)
+            chunk.append(record)
+    return chunk
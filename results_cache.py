@@ -0,0 +1,214 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from outputs import STATUS_SKIPPED, FileOutcome, load_files, load_source, merge_records, scan_folder
+from summary import summarize
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+# Bodies smaller than this are not worth compressing.
+MIN_COMPRESS_SIZE = 1024
+
+
+def supported_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+class _FolderEntry:
+    def __init__(self):
+        self.files = {}  # filename -> (mtime_ns, size, FileOutcome or None if unread)
+        self.records = []
+        self.body = b"[]"
+        self.source = None
+        self.etag = None
+        self.last_modified = None
+        self._encoded = {}
+        self._encoded_lock = threading.Lock()
+        self._summary = None
+
+    def summary(self):
+        """Return the farm rollups of this folder, computed once per load."""
+        if self._summary is None:
+            self._summary = summarize(self.records)
+        return self._summary
+
+    def outcomes(self):
+        """Return the per-file load outcome of every irrigation file in the folder."""
+        result = {}
+        for filename, (_, _, outcome) in sorted(self.files.items()):
+            if outcome is None:
+                outcome = FileOutcome(filename, STATUS_SKIPPED, None, f"not read: {self.source} source used")
+            result[filename] = {"status": outcome.status, "error": outcome.error}
+        return result
+
+    def outcome_counts(self):
+        counts = {}
+        for status in (outcome["status"] for outcome in self.outcomes().values()):
+            counts[status] = counts.get(status, 0) + 1
+        return counts
+
+    def encoded(self, encoding):
+        """Return the body compressed with ``encoding``, compressing at most once."""
+        if encoding is None or len(self.body) < MIN_COMPRESS_SIZE:
+            return None
+        with self._encoded_lock:
+            data = self._encoded.get(encoding)
+            if data is None:
+                if encoding == "br":
+                    data = brotli.compress(self.body)
+                elif encoding == "gzip":
+                    data = gzip.compress(self.body, compresslevel=6, mtime=0)
+                else:
+                    raise ValueError(f"Unsupported encoding: {encoding}")
+                self._encoded[encoding] = data
+            return data
+
+
+class ResultsCache:
+    """Per-date cache of parsed irrigation outputs and their encoded JSON body.
+
+    Files are re-parsed only when their mtime or size changes; the most recently
+    used ``max_dates`` folders are kept, older ones are evicted.
+    """
+
+    def __init__(self, max_dates=14, on_lookup=None):
+        self.max_dates = max_dates
+        # Optional ``on_lookup(result, files_parsed=0, evictions=0)`` callback
+        # for exporting the counters, e.g. RequestMetrics.observe_cache.
+        self.on_lookup = on_lookup
+        self._entries = OrderedDict()
+        # Guards the bookkeeping only; loading a folder happens under that
+        # date's own lock, so a cold load never blocks hits on other dates.
+        self._lock = threading.Lock()
+        self._date_locks = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.files_parsed = 0
+
+    def get(self, date, folder, count=True):
+        """Return the cached entry for ``date``, refreshing it from ``folder`` if needed.
+
+        Pass ``count=False`` for internal lookups (watcher polls, summaries) so
+        they do not skew the hit/miss counters.
+        """
+        entry = self._lookup(date, scan_folder(folder), count)
+        if entry is not None:
+            return entry
+
+        with self._lock:
+            date_lock = self._date_locks.setdefault(date, threading.Lock())
+        with date_lock:
+            # Another request may have refreshed the folder while this one waited.
+            stats = scan_folder(folder)
+            entry = self._lookup(date, stats, count)
+            if entry is not None:
+                return entry
+            with self._lock:
+                previous = self._entries.get(date)
+            entry, parsed = self._rebuild(previous, folder, stats)
+            evictions = 0
+            with self._lock:
+                if count:
+                    self.misses += 1
+                self.files_parsed += parsed
+                self._entries[date] = entry
+                self._entries.move_to_end(date)
+                while len(self._entries) > self.max_dates:
+                    self._entries.popitem(last=False)
+                    evictions += 1
+                self.evictions += evictions
+            if self.on_lookup is not None:
+                self.on_lookup("miss" if count else None, files_parsed=parsed, evictions=evictions)
+            return entry
+
+    def peek(self, date, folder):
+        """Return the entry for ``date`` only if it is cached and still current, else None."""
+        return self._lookup(date, scan_folder(folder), True)
+
+    def _lookup(self, date, stats, count):
+        with self._lock:
+            entry = self._entries.get(date)
+            if entry is None or not _unchanged(entry, stats):
+                return None
+            self._entries.move_to_end(date)
+            if count:
+                self.hits += 1
+        if count and self.on_lookup is not None:
+            self.on_lookup("hit")
+        return entry
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "dates": {date: entry.source for date, entry in self._entries.items()},
+                "max_dates": self.max_dates,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "files_parsed": self.files_parsed,
+            }
+
+    def _rebuild(self, previous, folder, stats):
+        old_files = previous.files if previous is not None else {}
+        entry = _FolderEntry()
+        parsed = 0
+
+        def load(filenames):
+            nonlocal parsed
+            parsed += self._load(entry, old_files, folder, stats, filenames)
+            return [entry.files[name][2] for name in filenames]
+
+        entry.source, outcomes = load_source(stats, load)
+        entry.records = merge_records(outcome.records or () for outcome in outcomes)
+        entry.body = json.dumps(entry.records).encode("utf-8")
+        entry.etag = hashlib.blake2b(entry.body, digest_size=16).hexdigest()
+        # Deleting the newest file must not move Last-Modified backwards: the
+        # directory mtime covers removals, the previous value covers the rest.
+        mtimes = [mtime_ns for mtime_ns, _ in stats.values()]
+        try:
+            mtimes.append(os.stat(folder).st_mtime_ns)
+        except FileNotFoundError:
+            pass
+        if mtimes:
+            entry.last_modified = max(mtimes) / 1e9
+        if previous is not None and previous.last_modified is not None:
+            entry.last_modified = max(entry.last_modified or 0, previous.last_modified)
+        # Files of the unused source are tracked by stat only, so any change to
+        # them still invalidates the entry.
+        for filename, (mtime_ns, size) in stats.items():
+            entry.files.setdefault(filename, (mtime_ns, size, None))
+        return entry, parsed
+
+    def _load(self, entry, old_files, folder, stats, filenames):
+        """Fill ``entry.files`` for ``filenames``, reusing unchanged outcomes; return the files parsed."""
+        pending = []
+        for filename in filenames:
+            cached = old_files.get(filename)
+            if cached is not None and cached[:2] == stats[filename] and cached[2] is not None:
+                # Malformed files are kept too, so they are only retried once they change.
+                entry.files[filename] = cached
+            else:
+                pending.append(filename)
+
+        parsed = 0
+        for outcome in load_files(folder, pending):
+            if outcome.records is not None:
+                parsed += 1
+            entry.files[outcome.filename] = stats[outcome.filename] + (outcome,)
+        return parsed
+
+
+def _unchanged(entry, stats):
+    if entry.files.keys() != stats.keys():
+        return False
+    return all(entry.files[name][:2] == stat for name, stat in stats.items())
@@ -0,0 +1,240 @@
+"""Persistent SQLite index over every ``Irrigation_Outputs/<date>/`` folder.
+
+Folders are ingested incrementally: a folder is re-read only when its file
+signature changes. Range, per-block and latest-per-block queries are then
+answered from the index instead of the raw JSON files.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from outputs import list_dates, load_folder, merge_records, scan_folder
+
+# Bump when the schema changes; the index is derived data, so an outdated one
+# is simply dropped and re-ingested.
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    date TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    source TEXT,
+    ingested_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS records (
+    date TEXT NOT NULL,
+    block TEXT NOT NULL,
+    ndvi REAL,
+    etc REAL,
+    irrigation_mm REAL,
+    irrigation_minutes REAL,
+    stress_flag INTEGER,
+    leaching_risk INTEGER,
+    fallback_used INTEGER,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (date, block)
+);
+CREATE INDEX IF NOT EXISTS records_block_date ON records (block, date);
+"""
+
+
+def folder_signature(stats):
+    digest = hashlib.blake2b(digest_size=16)
+    for name in sorted(stats):
+        mtime_ns, size = stats[name]
+        digest.update(f"{name}\0{mtime_ns}\0{size}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class ResultsIndex:
+    def __init__(self, db_path, outputs_dir, refresh_interval=5.0):
+        self.db_path = db_path
+        self.outputs_dir = outputs_dir
+        self.refresh_interval = refresh_interval
+        self._write_lock = threading.Lock()
+        self._last_refresh = 0.0
+        self._trends = {}  # (start, end) -> (generation, trends)
+        with self._connect() as conn:
+            if conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+                conn.execute("DROP TABLE IF EXISTS records")
+                conn.execute("DROP TABLE IF EXISTS folders")
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def refresh(self, force=False):
+        """Ingest new or changed date folders; throttled to ``refresh_interval``."""
+        now = time.monotonic()
+        if not force and now - self._last_refresh < self.refresh_interval:
+            return 0
+        with self._write_lock:
+            if not force and now - self._last_refresh < self.refresh_interval:
+                return 0
+            ingested = self._ingest(list_dates(self.outputs_dir))
+            self._last_refresh = time.monotonic()
+            return ingested
+
+    def rebuild(self):
+        """Drop the index and regenerate it from the raw JSON outputs."""
+        with self._write_lock:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM records")
+                conn.execute("DELETE FROM folders")
+            ingested = self._ingest(list_dates(self.outputs_dir))
+            self._last_refresh = time.monotonic()
+            return ingested
+
+    def _ingest(self, dates):
+        ingested = 0
+        with self._connect() as conn:
+            known = dict(conn.execute("SELECT date, signature FROM folders"))
+            for date in dates:
+                # Every folder is re-scanned: a file rewritten in place (e.g. a
+                # backfilled actual_irrigation_mm) leaves the directory mtime alone.
+                folder = os.path.join(self.outputs_dir, date)
+                stats = scan_folder(folder)
+                signature = folder_signature(stats)
+                if known.pop(date, None) == signature:
+                    continue
+                self._ingest_folder(conn, date, folder, stats, signature)
+                ingested += 1
+            # Folders that disappeared from disk leave the index too.
+            for date in known:
+                conn.execute("DELETE FROM records WHERE date = ?", (date,))
+                conn.execute("DELETE FROM folders WHERE date = ?", (date,))
+        return ingested
+
+    def _ingest_folder(self, conn, date, folder, stats, signature):
+        source, outcomes = load_folder(folder, stats)
+        record_lists = [outcome.records for outcome in outcomes if outcome.records is not None]
+        rows = [
+            (
+                date,
+                record.get("block") or "",
+                record.get("ndvi"),
+                record.get("etc"),
+                record.get("irrigation_mm"),
+                record.get("irrigation_minutes"),
+                record.get("stress_flag"),
+                record.get("leaching_risk"),
+                record.get("fallback_used"),
+                json.dumps(record),
+            )
+            for record in merge_records(record_lists)
+        ]
+        conn.execute("DELETE FROM records WHERE date = ?", (date,))
+        conn.executemany(
+            "INSERT OR REPLACE INTO records (date, block, ndvi, etc, irrigation_mm, irrigation_minutes,"
+            " stress_flag, leaching_risk, fallback_used, payload) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO folders (date, signature, source, ingested_at) VALUES (?, ?, ?, ?)",
+            (date, signature, source, time.time()),
+        )
+
+    def query(self, start=None, end=None, block=None):
+        """Return the records between ``start`` and ``end`` (inclusive), oldest first."""
+        return list(self.iter_query(start, end, block))
+
+    def iter_query(self, start=None, end=None, block=None):
+        """Like ``query`` but yields records straight from the cursor."""
+        clauses, params = [], []
+        if start:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("date <= ?")
+            params.append(end)
+        if block:
+            clauses.append("block = ?")
+            params.append(block)
+        sql = "SELECT payload FROM records"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY date, block"
+        with self._connect() as conn:
+            for row in conn.execute(sql, params):
+                yield json.loads(row[0])
+
+    def latest_per_block(self, block=None):
+        """Return the most recent record of every block (or of ``block`` only)."""
+        sql = (
+            "SELECT r.payload FROM records r"
+            " JOIN (SELECT block, MAX(date) AS date FROM records GROUP BY block) m"
+            " ON r.block = m.block AND r.date = m.date"
+        )
+        params = []
+        if block:
+            sql += " WHERE r.block = ?"
+            params.append(block)
+        sql += " ORDER BY r.block"
+        with self._connect() as conn:
+            return [json.loads(row[0]) for row in conn.execute(sql, params)]
+
+    def generation(self):
+        """Token that changes whenever any folder is (re-)ingested or dropped.
+
+        Read from the database rather than kept in memory, so ingests done by
+        another worker process are noticed too.
+        """
+        with self._connect() as conn:
+            return tuple(conn.execute("SELECT COUNT(*), MAX(ingested_at), TOTAL(ingested_at) FROM folders").fetchone())
+
+    def daily_trends(self, start=None, end=None):
+        """Return one farm-level rollup per indexed date, memoized per index generation."""
+        generation = self.generation()
+        cached = self._trends.get((start, end))
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        trends = self._query_trends(start, end)
+        if len(self._trends) >= 32:
+            self._trends.clear()
+        self._trends[(start, end)] = (generation, trends)
+        return trends
+
+    def _query_trends(self, start, end):
+        clauses, params = [], []
+        if start:
+            clauses.append("date >= ?")
+            params.append(start)
+        if end:
+            clauses.append("date <= ?")
+            params.append(end)
+        sql = (
+            "SELECT date, COUNT(*), TOTAL(irrigation_mm), TOTAL(irrigation_minutes), AVG(ndvi), MIN(ndvi), MAX(ndvi),"
+            " TOTAL(stress_flag = 1), TOTAL(leaching_risk = 1), TOTAL(fallback_used = 1) FROM records"
+        )
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " GROUP BY date ORDER BY date"
+        with self._connect() as conn:
+            return [
+                {
+                    "date": row[0],
+                    "blocks": row[1],
+                    "irrigation_mm": round(row[2], 4),
+                    "irrigation_minutes": round(row[3], 4),
+                    "ndvi_mean": row[4],
+                    "ndvi_min": row[5],
+                    "ndvi_max": row[6],
+                    "stress_flag_count": int(row[7]),
+                    "leaching_risk_count": int(row[8]),
+                    "fallback_used_count": int(row[9]),
+                }
+                for row in conn.execute(sql, params)
+            ]
@@ -0,0 +1,172 @@
+"""Server-side filtering, projection, sorting and pagination of result records.
+
+Query parameters::
+
+    fields=block,irrigation_minutes      keep only these fields
+    stress_flag=true                     equality predicate on a known record field
+    priority_score__gte=0.5              comparison (eq, ne, gt, gte, lt, lte)
+    sort=-priority_score,block           sort keys, "-" for descending
+    limit=50&offset=100                  pagination
+
+Other parameters (cache busters such as ``v=2``) are ignored.
+"""
+
+import itertools
+import operator
+
+# Parameters consumed by the endpoint itself, never treated as predicates.
+RESERVED_PARAMS = {"date", "from", "to", "block", "latest", "fields", "sort", "limit", "offset", "stream", "profile"}
+
+# Record fields that a bare ``name=value`` parameter filters on; any other
+# field needs an explicit ``name__op=value``.
+NUMERIC_FIELDS = {
+    "ndvi", "ndvi_avg", "ndvi_p80", "evi", "gndvi", "ndre", "kc", "eto", "etc", "efficiency",
+    "application_rate_mm_hr", "irrigation_mm", "irrigation_minutes", "confidence_score", "rain_mm",
+    "priority_score", "raw_mm_used", "ndvi_change", "actual_irrigation_mm", "irrigation_gap",
+}
+BOOLEAN_FIELDS = {
+    "fallback_used", "split_recommended", "stress_flag", "soil_capacity_flag", "leaching_risk", "stress_risk",
+}
+CATEGORY_FIELDS = {"crop", "crop_stage", "soil_type", "irrigation_type", "ndvi_display_mode"}
+FILTER_FIELDS = NUMERIC_FIELDS | BOOLEAN_FIELDS | CATEGORY_FIELDS
+
+OPERATORS = {
+    "eq": operator.eq,
+    "ne": operator.ne,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+}
+
+MAX_LIMIT = 10000
+
+
+class QueryError(ValueError):
+    pass
+
+
+def _parse_value(raw):
+    lowered = raw.lower()
+    if lowered in ("true", "false"):
+        return lowered == "true"
+    if lowered in ("null", "none"):
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
+
+
+def _parse_int(args, name, default):
+    raw = args.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise QueryError(f"{name} must be an integer")
+    if value < 0:
+        raise QueryError(f"{name} must not be negative")
+    return value
+
+
+class ResultsQuery:
+    def __init__(self, fields=None, predicates=(), sort=(), limit=None, offset=0):
+        self.fields = fields
+        self.predicates = list(predicates)
+        self.sort = list(sort)
+        self.limit = limit
+        self.offset = offset
+
+    @classmethod
+    def from_args(cls, args):
+        """Build a query from request args, raising QueryError on bad input."""
+        fields = None
+        if args.get("fields"):
+            fields = [name.strip() for name in args["fields"].split(",") if name.strip()]
+
+        predicates = []
+        for key, raw in args.items(multi=True):
+            if key in RESERVED_PARAMS:
+                continue
+            name, _, op = key.partition("__")
+            if not op:
+                if name not in FILTER_FIELDS:
+                    continue  # Not a filter, e.g. a "_" or "v" cache buster
+                op = "eq"
+            if op not in OPERATORS:
+                raise QueryError(f"Unknown operator '{op}' in '{key}'")
+            value = _parse_value(raw)
+            if isinstance(value, str) and op not in ("eq", "ne"):
+                raise QueryError(f"'{key}' needs a numeric or boolean value")
+            predicates.append((name, OPERATORS[op], value))
+
+        sort = []
+        if args.get("sort"):
+            for key in args["sort"].split(","):
+                key = key.strip()
+                if key:
+                    sort.append((key.lstrip("-"), key.startswith("-")))
+
+        limit = _parse_int(args, "limit", None)
+        if limit is not None and limit > MAX_LIMIT:
+            raise QueryError(f"limit must be at most {MAX_LIMIT}")
+        offset = _parse_int(args, "offset", 0)
+        return cls(fields, predicates, sort, limit, offset)
+
+    def is_trivial(self):
+        return not (self.fields or self.predicates or self.sort or self.limit is not None or self.offset)
+
+    def matches(self, record):
+        for name, op, value in self.predicates:
+            actual = record.get(name)
+            if actual is None or value is None:
+                # Only equality is meaningful against null.
+                both = actual is None and value is None
+                if op is operator.eq:
+                    ok = both
+                elif op is operator.ne:
+                    ok = not both
+                else:
+                    ok = False
+                if not ok:
+                    return False
+                continue
+            try:
+                if not op(actual, value):
+                    return False
+            except TypeError:
+                return False
+        return True
+
+    def project(self, record):
+        if self.fields is None:
+            return record
+        return {name: record[name] for name in self.fields if name in record}
+
+    def apply(self, records):
+        """Return ``(page, total)`` for ``records``; ``total`` counts every match."""
+        matched = [record for record in records if self.matches(record)] if self.predicates else list(records)
+        for name, descending in reversed(self.sort):
+            # Records missing the key sort last in either direction.
+            present = [record for record in matched if record.get(name) is not None]
+            missing = [record for record in matched if record.get(name) is None]
+            try:
+                present.sort(key=operator.itemgetter(name), reverse=descending)
+            except TypeError:
+                raise QueryError(f"Cannot sort by '{name}': mixed value types")
+            matched = present + missing
+        total = len(matched)
+        end = None if self.limit is None else self.offset + self.limit
+        return [self.project(record) for record in matched[self.offset:end]], total
+
+    def iter_page(self, records):
+        """Lazily filter, paginate and project ``records``; sorting is not supported."""
+        if self.sort:
+            raise QueryError("sort is not supported when streaming")
+        if self.predicates:
+            records = (record for record in records if self.matches(record))
+        end = None if self.limit is None else self.offset + self.limit
+        for record in itertools.islice(records, self.offset, end):
+            yield self.project(record)
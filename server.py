@@ -1,36 +1,379 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, g, jsonify, request
 from flask_cors import CORS
-import os
+import cProfile
+import hashlib
+import itertools
 import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, RequestMetrics
+from outputs import DATE_RE, JSON_DECODER, files_read, iter_folder_chunks, latest_date, read_summary_csv
+from results_cache import ResultsCache, supported_encodings
+from results_index import ResultsIndex
+from results_query import QueryError, ResultsQuery
+from summary import summarize
+from watcher import ResultsWatcher
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["ETag", "X-Irrigation-Source", "X-Irrigation-Files", "X-Total-Count", "X-Next-Offset"])
+
+OUTPUTS_DIR = os.environ.get("IRRIXA_OUTPUTS_DIR", os.path.join(os.path.dirname(__file__), "Irrigation_Outputs"))
+request_metrics = RequestMetrics()
+results_cache = ResultsCache(
+    max_dates=int(os.environ.get("IRRIXA_CACHE_DATES", 14)),
+    on_lookup=request_metrics.observe_cache,
+)
+results_index = ResultsIndex(
+    os.environ.get("IRRIXA_INDEX_PATH", os.path.join(os.path.dirname(__file__), "irrixa_index.sqlite3")),
+    OUTPUTS_DIR,
+    refresh_interval=float(os.environ.get("IRRIXA_INDEX_REFRESH_SECONDS", 5)),
+)
+results_watcher = ResultsWatcher(
+    results_cache,
+    OUTPUTS_DIR,
+    poll_interval=float(os.environ.get("IRRIXA_WATCH_INTERVAL", 2)),
+    # Each SSE client holds a worker thread (see gunicorn.conf.py); unset means no limit.
+    max_subscribers=int(os.environ["IRRIXA_SSE_MAX_CLIENTS"]) if os.environ.get("IRRIXA_SSE_MAX_CLIENTS") else None,
+)
+# Per-request profiling (?profile=1) is only honoured when explicitly enabled.
+PROFILING = os.environ.get("IRRIXA_PROFILING") == "1"
+PROFILE_DIR = os.environ.get("IRRIXA_PROFILE_DIR", tempfile.gettempdir())
+
+NDJSON = "application/x-ndjson"
+STREAM_BATCH = 500
+SSE_KEEPALIVE_SECONDS = 15
+SSE_RETRY_SECONDS = 5
+
+SUMMARY_BODY_CACHE_SIZE = 32
+_summary_bodies = OrderedDict()  # (date, folder etag, from, to, index generation) -> (body, etag)
+_summary_bodies_lock = threading.Lock()
+
+@app.before_request
+def _start_request():
+    g.request_started = time.perf_counter()
+    g.files_read_before = files_read()
+    if PROFILING and _flag("profile"):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # Another request is already being profiled
+            return
+        g.profiler = profiler
+
+@app.after_request
+def _finish_request(response):
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        path = os.path.join(PROFILE_DIR, f"irrixa-{os.getpid()}-{time.time_ns()}.prof")
+        profiler.dump_stats(path)
+        response.headers["X-Profile-File"] = path
+
+    request_metrics.observe(
+        request.url_rule.rule if request.url_rule else "unmatched",
+        request.method,
+        response.status_code,
+        time.perf_counter() - g.request_started,
+        None if response.is_streamed else response.content_length,
+        files_read() - g.files_read_before,
+    )
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    return Response(request_metrics.render(), content_type=METRICS_CONTENT_TYPE)
 
 @app.route("/api/irrigation-results", methods=["GET"])
 def get_irrigation_results():
-    today = "2025-05-17"
-    folder = os.path.join(os.path.dirname(__file__), "Irrigation_Outputs", today)
-
-    if not os.path.exists(folder):
-        return jsonify([])  # Return an empty list, not an error
-
-    results = []
-    for filename in os.listdir(folder):
-        if filename.endswith("_irrigation.json"):
-            file_path = os.path.join(folder, filename)
-            try:
-                with open(file_path, "r") as f:
-                    data = json.load(f)
-                    if isinstance(data, list):
-                        results.extend(data)  # Flatten any nested list
-                    elif isinstance(data, dict):
-                        results.append(data)
-            except Exception as e:
-                print(f"⚠️ Skipped {filename}: {e}")
-
-    return jsonify(results)
+    query = ResultsQuery.from_args(request.args)
+    stream = _wants_stream()
+    if stream and query.sort:
+        return jsonify({"error": "sort is not supported when streaming"}), 400
+
+    if _uses_index():
+        return _index_response(query, stream)
+
+    date = _requested_date()
+    folder = os.path.join(OUTPUTS_DIR, date) if date else None
+    if folder is None or not os.path.exists(folder):
+        # Return an empty list, not an error
+        if stream:
+            return _stream_response(iter(()), query)
+        response = jsonify([])
+        response.vary.add("Accept")
+        return response
+
+    if stream:
+        # A warm entry already holds the records; otherwise read the folder
+        # incrementally rather than loading it whole into the cache.
+        entry = results_cache.peek(date, folder)
+        if entry is not None:
+            return _stream_response(iter(entry.records), query)
+        return _stream_response(itertools.chain.from_iterable(iter_folder_chunks(folder)), query)
+
+    entry = results_cache.get(date, folder)
+    if query.is_trivial():
+        return _cached_response(entry)
+    response = _query_response(entry.records, query, etag=f"{entry.etag}-{_args_digest()}")
+    _add_entry_headers(response, entry)
+    return response
+
+@app.route("/api/irrigation-results/stream", methods=["GET"])
+def stream_irrigation_results():
+    # Every client shares the one watcher; each only receives the changed records.
+    send_snapshot = _flag("snapshot")
+    if not results_watcher.has_capacity():
+        response = jsonify({"error": "Too many live-update clients on this worker"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(SSE_RETRY_SECONDS)
+        return response
+
+    def generate():
+        # Subscribe only once the body is actually iterated; a response that is
+        # never iterated (e.g. HEAD) never reaches the cleanup in ``finally``.
+        subscriber = results_watcher.subscribe()
+        if subscriber is None:
+            # Filled up since the check above; the client retries shortly.
+            yield f"retry: {SSE_RETRY_SECONDS * 1000}\n\n"
+            return
+        try:
+            yield f"retry: {SSE_RETRY_SECONDS * 1000}\n\n"
+            if send_snapshot:
+                date, records = results_watcher.snapshot()
+                yield _sse("snapshot", {"date": date, "changed": records, "removed": []})
+            while True:
+                try:
+                    message = subscriber.get(timeout=SSE_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if message is None:
+                    return
+                yield _sse("delta", message, message["id"])
+        finally:
+            results_watcher.unsubscribe(subscriber)
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.cache_control.no_cache = True
+    response.headers["X-Accel-Buffering"] = "no"  # Don't let a proxy buffer the stream
+    return response
+
+def _sse(event, data, event_id=None):
+    lines = [f"event: {event}"]
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+@app.route("/api/irrigation-summary", methods=["GET"])
+def get_irrigation_summary():
+    date = _requested_date()
+    start, end = _requested_range()
+    folder = os.path.join(OUTPUTS_DIR, date) if date else None
+
+    entry = None
+    if folder is not None and os.path.exists(folder):
+        entry = results_cache.get(date, folder, count=False)
+    results_index.refresh()
+    generation = results_index.generation()
+
+    # The encoded body is reused until the folder or the index changes. The
+    # CSV fallback is tiny and not tracked by the cache, so it is never reused.
+    use_csv = entry is not None and not entry.records
+    key = (date, entry.etag if entry is not None else None, start, end, generation)
+    with _summary_bodies_lock:
+        cached = None if use_csv else _summary_bodies.get(key)
+    if cached is None:
+        source, summary = None, None
+        if entry is not None and entry.records:
+            source, summary = entry.source, entry.summary()
+        elif use_csv:
+            # No block outputs (yet): fall back to the pipeline's partial CSV rollup.
+            rows = read_summary_csv(folder)
+            if rows:
+                source, summary = "summary_csv", summarize(rows)
+        if summary is None:
+            summary = summarize([])
+        body = json.dumps(
+            {"date": date, "source": source, **summary, "trends": results_index.daily_trends(start, end)}
+        ).encode("utf-8")
+        cached = (body, hashlib.blake2b(body, digest_size=16).hexdigest())
+        if not use_csv:
+            with _summary_bodies_lock:
+                _summary_bodies[key] = cached
+                while len(_summary_bodies) > SUMMARY_BODY_CACHE_SIZE:
+                    _summary_bodies.popitem(last=False)
+
+    body, etag = cached
+    response = Response(body, mimetype="application/json")
+    response.cache_control.no_cache = True
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+@app.route("/api/irrigation-results/diagnostics", methods=["GET"])
+def get_irrigation_diagnostics():
+    date = _requested_date()
+    folder = os.path.join(OUTPUTS_DIR, date) if date else None
+    if folder is None or not os.path.exists(folder):
+        return jsonify({"date": date, "source": None, "decoder": JSON_DECODER, "counts": {}, "files": {}})
+
+    entry = results_cache.get(date, folder, count=False)
+    return jsonify({
+        "date": date,
+        "source": entry.source,
+        "decoder": JSON_DECODER,
+        "counts": entry.outcome_counts(),
+        "files": entry.outcomes(),
+    })
+
+@app.errorhandler(QueryError)
+def handle_query_error(e):
+    return jsonify({"error": str(e)}), 400
+
+def _requested_date():
+    """Return ``?date=`` or, by default, the newest output folder (None if there is none)."""
+    date = request.args.get("date")
+    if date is None:
+        return latest_date(OUTPUTS_DIR)
+    if not DATE_RE.match(date):
+        raise QueryError("date must be YYYY-MM-DD")
+    return date
+
+def _requested_range():
+    start, end = request.args.get("from"), request.args.get("to")
+    for value in (start, end):
+        if value and not DATE_RE.match(value):
+            raise QueryError("from/to must be YYYY-MM-DD")
+    return start, end
+
+def _uses_index():
+    """Whether the request asks for the history index rather than one date folder."""
+    return _flag("latest") or any(request.args.get(name) for name in ("from", "to", "block"))
+
+def _index_response(query, stream=False):
+    start, end = _requested_range()
+    date = request.args.get("date")
+    if date:
+        if not DATE_RE.match(date):
+            raise QueryError("date must be YYYY-MM-DD")
+        if start or end:
+            raise QueryError("date cannot be combined with from/to")
+        start = end = date
+    if _flag("latest") and (start or end):
+        raise QueryError("latest cannot be combined with date or from/to")
+    results_index.refresh()
+    block = request.args.get("block") or None
+    if _flag("latest"):
+        records = results_index.latest_per_block(block)
+        if stream:
+            return _stream_response(iter(records), query)
+    elif stream:
+        return _stream_response(results_index.iter_query(start, end, block), query)
+    else:
+        records = results_index.query(start, end, block)
+    return _query_response(records, query)
+
+def _wants_stream():
+    if "stream" in request.args:
+        return _flag("stream")
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+def _stream_response(records, query):
+    # One JSON record per line, flushed in batches, so neither the records nor
+    # the body are ever held in memory in full.
+    def generate():
+        page = query.iter_page(records)
+        while True:
+            batch = list(itertools.islice(page, STREAM_BATCH))
+            if not batch:
+                return
+            yield "".join(json.dumps(record) + "\n" for record in batch)
+
+    response = Response(generate(), mimetype=NDJSON)
+    response.vary.add("Accept")
+    return response
+
+def _query_response(records, query, etag=None):
+    # A known ETag lets unchanged polls skip filtering and serialization.
+    if etag is not None and request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    page, total = query.apply(records)
+    response = jsonify(page)
+    response.vary.add("Accept")  # NDJSON is negotiated on the same URL
+    response.headers["X-Total-Count"] = str(total)
+    if query.limit is not None and query.offset + query.limit < total:
+        response.headers["X-Next-Offset"] = str(query.offset + query.limit)
+    response.cache_control.no_cache = True
+    if etag is not None:
+        response.set_etag(etag)
+    else:
+        response.add_etag()
+    return response.make_conditional(request)
+
+def _args_digest():
+    canonical = "&".join(f"{key}={value}" for key, value in sorted(request.args.items(multi=True)))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=8).hexdigest()
+
+def _flag(name):
+    return request.args.get(name, "").lower() in ("1", "true", "yes")
+
+def _cached_response(entry):
+    # Compressed variants are cached on the entry, so negotiating an encoding
+    # never re-compresses an unchanged folder.
+    encoding = request.accept_encodings.best_match(supported_encodings())
+    body = entry.encoded(encoding)
+    if body is None:
+        encoding, body = None, entry.body
+
+    response = Response(body, mimetype="application/json")
+    _add_entry_headers(response, entry)
+    response.vary.add("Accept-Encoding")
+    response.vary.add("Accept")  # NDJSON is negotiated on the same URL
+    response.cache_control.no_cache = True  # Always revalidate with the ETag
+    if encoding:
+        response.content_encoding = encoding
+        response.set_etag(f"{entry.etag}-{encoding}")
+    else:
+        response.set_etag(entry.etag)
+    if entry.last_modified is not None:
+        response.last_modified = entry.last_modified
+    return response.make_conditional(request)
+
+def _add_entry_headers(response, entry):
+    response.headers["X-Irrigation-Source"] = entry.source
+    response.headers["X-Irrigation-Files"] = ", ".join(
+        f"{status}={count}" for status, count in sorted(entry.outcome_counts().items())
+    )
+
+@app.route("/api/cache-stats", methods=["GET"])
+def get_cache_stats():
+    return jsonify(results_cache.stats())
+
+def warm_up():
+    """Bring the index up to date and pre-load the newest output folder before serving."""
+    results_index.refresh(force=True)
+    date = latest_date(OUTPUTS_DIR)
+    if date is None:
+        return
+    entry = results_cache.get(date, os.path.join(OUTPUTS_DIR, date), count=False)
+    for encoding in supported_encodings():
+        entry.encoded(encoding)
+    entry.summary()
+
+@app.cli.command("rebuild-index")
+def rebuild_index():
+    """Regenerate the results index from the raw JSON outputs."""
+    count = results_index.rebuild()
+    print(f"✅ Indexed {count} date folders into {results_index.db_path}")
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port)
-
@@ -0,0 +1,85 @@
+"""Farm-level rollups of irrigation records.
+
+Rollups are computed once per loaded folder (see ``ResultsCache``) and grouped
+by block prefix (``D2_Bay_10`` -> ``D2_Bay``), ``soil_type`` and ``crop``.
+"""
+
+FLAG_FIELDS = ("stress_flag", "leaching_risk", "fallback_used")
+
+
+def block_prefix(block):
+    """Group key for a block name: everything before its last ``_`` segment."""
+    if not block:
+        return "unknown"
+    prefix, sep, _ = block.rpartition("_")
+    return prefix if sep and prefix else block
+
+
+def _number(value):
+    if isinstance(value, bool) or value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class Rollup:
+    def __init__(self):
+        self.blocks = 0
+        self.irrigation_mm = 0.0
+        self.irrigation_minutes = 0.0
+        self.ndvi_count = 0
+        self.ndvi_sum = 0.0
+        self.ndvi_min = None
+        self.ndvi_max = None
+        self.flags = dict.fromkeys(FLAG_FIELDS, 0)
+
+    def add(self, record):
+        self.blocks += 1
+        self.irrigation_mm += _number(record.get("irrigation_mm")) or 0
+        self.irrigation_minutes += _number(record.get("irrigation_minutes")) or 0
+        ndvi = _number(record.get("ndvi"))
+        if ndvi is not None:
+            self.ndvi_count += 1
+            self.ndvi_sum += ndvi
+            self.ndvi_min = ndvi if self.ndvi_min is None else min(self.ndvi_min, ndvi)
+            self.ndvi_max = ndvi if self.ndvi_max is None else max(self.ndvi_max, ndvi)
+        for name in FLAG_FIELDS:
+            if record.get(name) is True:
+                self.flags[name] += 1
+
+    def to_dict(self):
+        return {
+            "blocks": self.blocks,
+            "irrigation_mm": round(self.irrigation_mm, 4),
+            "irrigation_minutes": round(self.irrigation_minutes, 4),
+            "ndvi_mean": self.ndvi_sum / self.ndvi_count if self.ndvi_count else None,
+            "ndvi_min": self.ndvi_min,
+            "ndvi_max": self.ndvi_max,
+            **{f"{name}_count": count for name, count in self.flags.items()},
+        }
+
+
+def summarize(records):
+    """Return the farm totals and the per-prefix, per-soil and per-crop rollups of ``records``."""
+    totals = Rollup()
+    groups = {"by_prefix": {}, "by_soil_type": {}, "by_crop": {}}
+    for record in records:
+        totals.add(record)
+        keys = {
+            "by_prefix": block_prefix(record.get("block")),
+            "by_soil_type": record.get("soil_type") or "unknown",
+            "by_crop": record.get("crop") or "unknown",
+        }
+        for group, key in keys.items():
+            rollup = groups[group].get(key)
+            if rollup is None:
+                rollup = groups[group][key] = Rollup()
+            rollup.add(record)
+    result = {"totals": totals.to_dict()}
+    for group, rollups in groups.items():
+        result[group] = {key: rollup.to_dict() for key, rollup in sorted(rollups.items())}
+    return result
@@ -0,0 +1,81 @@
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# server builds its index and reads its outputs directory at import time, so
+# both must point somewhere disposable before any test module imports it.
+_tmp = tempfile.mkdtemp(prefix="irrixa-tests-")
+os.environ.setdefault("IRRIXA_OUTPUTS_DIR", os.path.join(_tmp, "Irrigation_Outputs"))
+os.environ.setdefault("IRRIXA_INDEX_PATH", os.path.join(_tmp, "index.sqlite3"))
+
+from outputs import AGGREGATE_FILE, BLOCK_SUFFIX  # noqa: E402
+
+# A fixed base time, so tests can order files by mtime explicitly.
+BASE_MTIME_NS = 1_746_000_000 * 10**9
+
+
+def make_record(block, date, **fields):
+    record = {
+        "block": block,
+        "date": date,
+        "crop": "citrus",
+        "soil_type": "loam",
+        "ndvi": 0.61,
+        "irrigation_minutes": 42.0,
+        "priority_score": 0.5,
+        "stress_flag": False,
+    }
+    record.update(fields)
+    return record
+
+
+class OutputsTree:
+    """Writes ``Irrigation_Outputs/<date>/`` folders with controlled mtimes."""
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def folder(self, date):
+        path = os.path.join(self.root, date)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def write_block(self, date, record, mtime_offset=0):
+        return self._write(date, f"{record['block']}{BLOCK_SUFFIX}", json.dumps(record), mtime_offset)
+
+    def write_aggregate(self, date, records, mtime_offset=0):
+        return self._write(date, AGGREGATE_FILE, json.dumps(records), mtime_offset)
+
+    def write_raw(self, date, filename, text, mtime_offset=0):
+        return self._write(date, filename, text, mtime_offset)
+
+    def write_date(self, date, records, aggregate=True):
+        """Write one file per record and, written last, the aggregate."""
+        for record in records:
+            self.write_block(date, record)
+        if aggregate:
+            self.write_aggregate(date, records, mtime_offset=1)
+        return self.folder(date)
+
+    def touch(self, date, filename, mtime_offset):
+        path = os.path.join(self.folder(date), filename)
+        mtime_ns = BASE_MTIME_NS + mtime_offset * 10**9
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    def _write(self, date, filename, text, mtime_offset):
+        path = os.path.join(self.folder(date), filename)
+        with open(path, "w") as f:
+            f.write(text)
+        self.touch(date, filename, mtime_offset)
+        return path
+
+
+@pytest.fixture
+def tree(tmp_path):
+    return OutputsTree(str(tmp_path / "Irrigation_Outputs"))
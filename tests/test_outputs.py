@@ -0,0 +1,64 @@
+import os
+
+import outputs
+from conftest import BASE_MTIME_NS, make_record
+from outputs import (
+    AGGREGATE_FILE,
+    SOURCE_BLOCKS,
+    STATUS_MALFORMED,
+    STATUS_OK,
+    latest_date,
+    load_files,
+    load_folder,
+    merge_records,
+    scan_folder,
+)
+from results_cache import ResultsCache
+
+DATE = "2025-05-17"
+
+
+def test_load_files_keeps_order_on_a_pool_of_the_requested_size(tree):
+    folder = tree.write_date(DATE, [make_record(f"D2_Bay_{i}", DATE) for i in range(1, 8)], aggregate=False)
+    tree.write_raw(DATE, "D2_Bay_8_irrigation.json", "{")
+    filenames = [f"D2_Bay_{i}_irrigation.json" for i in (8, 3, 1, 7, 2, 6, 5, 4)]
+
+    outcomes = load_files(folder, filenames, workers=3)
+
+    assert [outcome.filename for outcome in outcomes] == filenames
+    assert [outcome.status for outcome in outcomes] == [STATUS_MALFORMED] + [STATUS_OK] * 7
+    assert outputs._get_executor(3)._max_workers == 3
+
+
+def test_load_folder_and_cache_share_the_malformed_aggregate_fallback(tree):
+    folder = tree.write_date(DATE, [make_record(f"D2_Bay_{i}", DATE) for i in range(1, 4)], aggregate=False)
+    tree.write_raw(DATE, AGGREGATE_FILE, "[{", mtime_offset=1)
+    stats = scan_folder(folder)
+
+    source, outcomes = load_folder(folder, stats)
+    entry = ResultsCache().get(DATE, folder)
+
+    assert source == entry.source == SOURCE_BLOCKS
+    assert merge_records(outcome.records for outcome in outcomes) == entry.records
+
+
+def test_latest_date_is_reused_until_the_directory_changes(tree, monkeypatch):
+    tree.write_date("2025-05-16", [make_record("D2_Bay_1", "2025-05-16")])
+    tree.write_date(DATE, [make_record("D2_Bay_1", DATE)])
+    os.utime(tree.root, ns=(BASE_MTIME_NS, BASE_MTIME_NS))
+    calls = []
+    list_dates = outputs.list_dates
+    monkeypatch.setattr(outputs, "list_dates", lambda path: calls.append(path) or list_dates(path))
+
+    assert latest_date(tree.root) == DATE
+    assert latest_date(tree.root) == DATE
+    assert len(calls) == 1
+
+    tree.write_date("2025-05-18", [make_record("D2_Bay_1", "2025-05-18")])
+    assert latest_date(tree.root) == "2025-05-18"
+    assert len(calls) == 2
+
+
+def test_latest_date_without_outputs(tmp_path):
+    assert latest_date(str(tmp_path / "missing")) is None
+    assert latest_date(str(tmp_path)) is None
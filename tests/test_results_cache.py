@@ -0,0 +1,129 @@
+import json
+
+from conftest import make_record
+from outputs import AGGREGATE_FILE, SOURCE_AGGREGATE, SOURCE_BLOCKS, STATUS_MALFORMED, STATUS_OK, STATUS_SKIPPED
+from results_cache import ResultsCache
+
+DATE = "2025-05-17"
+
+
+def _records(date=DATE, count=3):
+    return [make_record(f"D2_Bay_{i}", date, irrigation_minutes=10.0 * i) for i in range(1, count + 1)]
+
+
+def test_unchanged_folder_is_a_hit(tree):
+    folder = tree.write_date(DATE, _records())
+    cache = ResultsCache()
+
+    first = cache.get(DATE, folder)
+    second = cache.get(DATE, folder)
+
+    assert second is first
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["files_parsed"]) == (1, 1, 1)
+
+
+def test_mtime_change_invalidates(tree):
+    folder = tree.write_date(DATE, _records())
+    cache = ResultsCache()
+    first = cache.get(DATE, folder)
+
+    tree.touch(DATE, AGGREGATE_FILE, mtime_offset=5)
+    second = cache.get(DATE, folder)
+
+    assert second is not first
+    assert cache.stats()["misses"] == 2
+    assert second.last_modified >= first.last_modified
+
+
+def test_size_change_with_same_mtime_invalidates(tree):
+    records = _records()
+    folder = tree.write_date(DATE, records)
+    cache = ResultsCache()
+    cache.get(DATE, folder)
+
+    records[0]["irrigation_minutes"] = 123.456
+    tree.write_aggregate(DATE, records, mtime_offset=1)  # Same mtime as before
+    entry = cache.get(DATE, folder)
+
+    assert entry.records[0]["irrigation_minutes"] == 123.456
+    assert json.loads(entry.body) == entry.records
+
+
+def test_only_changed_block_files_are_reparsed(tree):
+    records = _records()
+    folder = tree.write_date(DATE, records, aggregate=False)
+    cache = ResultsCache()
+    cache.get(DATE, folder)
+    assert cache.stats()["files_parsed"] == 3
+
+    records[1]["stress_flag"] = True
+    tree.write_block(DATE, records[1], mtime_offset=5)
+    entry = cache.get(DATE, folder)
+
+    assert cache.stats()["files_parsed"] == 4
+    assert [r["stress_flag"] for r in entry.records] == [False, True, False]
+
+
+def test_least_recently_used_date_is_evicted(tree):
+    dates = ["2025-05-15", "2025-05-16", "2025-05-17"]
+    folders = {date: tree.write_date(date, _records(date)) for date in dates}
+    cache = ResultsCache(max_dates=2)
+
+    cache.get(dates[0], folders[dates[0]])
+    cache.get(dates[1], folders[dates[1]])
+    cache.get(dates[0], folders[dates[0]])  # Now the most recently used
+    cache.get(dates[2], folders[dates[2]])
+
+    stats = cache.stats()
+    assert sorted(stats["dates"]) == [dates[0], dates[2]]
+    assert stats["evictions"] == 1
+
+    cache.get(dates[1], folders[dates[1]])
+    assert cache.stats()["misses"] == 4
+
+
+def test_newest_aggregate_is_read_instead_of_blocks(tree):
+    folder = tree.write_date(DATE, _records())
+    entry = ResultsCache().get(DATE, folder)
+
+    assert entry.source == SOURCE_AGGREGATE
+    assert entry.outcome_counts() == {STATUS_OK: 1, STATUS_SKIPPED: 3}
+    assert len(entry.records) == 3
+
+
+def test_block_newer_than_aggregate_switches_to_blocks(tree):
+    records = _records()
+    folder = tree.write_date(DATE, records)
+    cache = ResultsCache()
+    assert cache.get(DATE, folder).source == SOURCE_AGGREGATE
+
+    records[2]["irrigation_minutes"] = 99.0
+    tree.write_block(DATE, records[2], mtime_offset=5)
+    entry = cache.get(DATE, folder)
+
+    assert entry.source == SOURCE_BLOCKS
+    assert entry.outcomes()[AGGREGATE_FILE]["status"] == STATUS_SKIPPED
+    assert [r["irrigation_minutes"] for r in entry.records] == [10.0, 20.0, 99.0]
+
+
+def test_malformed_aggregate_falls_back_to_blocks(tree):
+    folder = tree.write_date(DATE, _records(), aggregate=False)
+    tree.write_raw(DATE, AGGREGATE_FILE, '[{"block": "D2_Bay_1",', mtime_offset=1)
+
+    entry = ResultsCache().get(DATE, folder)
+
+    assert entry.source == SOURCE_BLOCKS
+    assert entry.outcomes()[AGGREGATE_FILE]["status"] == STATUS_MALFORMED
+    assert entry.outcome_counts() == {STATUS_MALFORMED: 1, STATUS_OK: 3}
+    assert sorted(r["block"] for r in entry.records) == ["D2_Bay_1", "D2_Bay_2", "D2_Bay_3"]
+
+
+def test_duplicate_block_and_date_keeps_the_last_record(tree):
+    record = make_record("D2_Bay_1", DATE, irrigation_minutes=1.0)
+    folder = tree.write_date(DATE, [], aggregate=False)
+    tree.write_aggregate(DATE, [record, dict(record, irrigation_minutes=2.0)])
+
+    entry = ResultsCache().get(DATE, folder)
+
+    assert [r["irrigation_minutes"] for r in entry.records] == [2.0]
@@ -0,0 +1,136 @@
+import os
+import shutil
+
+import pytest
+
+import server
+from conftest import make_record
+from results_cache import ResultsCache
+from results_index import ResultsIndex
+
+DATES = ["2025-05-10", "2025-05-11", "2025-05-12", "2025-05-13"]
+BLOCKS = ["D2_Bay_1", "D2_Bay_2"]
+RESULTS = "/api/irrigation-results"
+
+
+@pytest.fixture
+def history(tree):
+    for day, date in enumerate(DATES):
+        tree.write_date(date, [make_record(block, date, irrigation_mm=1.0 + day) for block in BLOCKS])
+    return tree
+
+
+@pytest.fixture
+def index(history, tmp_path):
+    index = ResultsIndex(str(tmp_path / "index.sqlite3"), history.root, refresh_interval=0)
+    index.refresh(force=True)
+    return index
+
+
+def test_old_file_rewritten_in_place_is_reingested(index, history):
+    folder = history.folder(DATES[0])
+    dir_mtime_ns = os.stat(folder).st_mtime_ns
+
+    history.write_aggregate(DATES[0], [make_record(block, DATES[0], irrigation_mm=99.0) for block in BLOCKS], 5)
+    os.utime(folder, ns=(dir_mtime_ns, dir_mtime_ns))
+
+    assert index.refresh(force=True) == 1
+    assert [r["irrigation_mm"] for r in index.query(DATES[0], DATES[0], "D2_Bay_1")] == [99.0]
+    assert index.daily_trends(DATES[0], DATES[0])[0]["irrigation_mm"] == 198.0
+
+
+def test_range_and_block_queries(index):
+    records = index.query("2025-05-11", "2025-05-12")
+    assert [(r["date"], r["block"]) for r in records] == [
+        ("2025-05-11", "D2_Bay_1"), ("2025-05-11", "D2_Bay_2"),
+        ("2025-05-12", "D2_Bay_1"), ("2025-05-12", "D2_Bay_2"),
+    ]
+
+    records = index.query(block="D2_Bay_2")
+    assert [r["date"] for r in records] == DATES
+    assert list(index.iter_query(start="2025-05-13")) == index.query("2025-05-13")
+
+
+def test_latest_per_block(index, history):
+    history.write_date("2025-05-14", [make_record("D2_Bay_1", "2025-05-14", irrigation_mm=7.0)])
+    index.refresh()
+
+    latest = {r["block"]: r["date"] for r in index.latest_per_block()}
+    assert latest == {"D2_Bay_1": "2025-05-14", "D2_Bay_2": DATES[-1]}
+    assert [r["irrigation_mm"] for r in index.latest_per_block("D2_Bay_1")] == [7.0]
+
+
+def test_refresh_only_reingests_changed_folders(index, history):
+    assert index.refresh() == 0
+    generation = index.generation()
+
+    history.write_block(DATES[-1], make_record("D2_Bay_1", DATES[-1], irrigation_mm=5.5), mtime_offset=5)
+
+    assert index.refresh() == 1
+    assert index.generation() != generation
+    assert [r["irrigation_mm"] for r in index.query(DATES[-1], DATES[-1], "D2_Bay_1")] == [5.5]
+
+
+def test_removed_folder_leaves_the_index(index, history):
+    shutil.rmtree(history.folder(DATES[0]))
+
+    index.refresh()
+
+    assert {r["date"] for r in index.query()} == set(DATES[1:])
+    assert [trend["date"] for trend in index.daily_trends()] == DATES[1:]
+
+
+def test_rebuild_reingests_everything(index):
+    assert index.rebuild() == len(DATES)
+    assert len(index.query()) == len(DATES) * len(BLOCKS)
+
+
+@pytest.fixture
+def client(history, index, monkeypatch):
+    monkeypatch.setattr(server, "OUTPUTS_DIR", history.root)
+    monkeypatch.setattr(server, "results_cache", ResultsCache())
+    monkeypatch.setattr(server, "results_index", index)
+    return server.app.test_client()
+
+
+def test_endpoint_range_and_block(client):
+    response = client.get(RESULTS, query_string={"from": "2025-05-12", "block": "D2_Bay_1"})
+
+    assert response.status_code == 200
+    assert [r["date"] for r in response.get_json()] == ["2025-05-12", "2025-05-13"]
+    assert response.headers["X-Total-Count"] == "2"
+
+
+def test_endpoint_date_with_block_uses_the_index(client):
+    response = client.get(RESULTS, query_string={"date": DATES[0], "block": "D2_Bay_2"})
+
+    assert [(r["date"], r["block"]) for r in response.get_json()] == [(DATES[0], "D2_Bay_2")]
+
+
+def test_endpoint_latest(client):
+    response = client.get(RESULTS, query_string={"latest": "1"})
+
+    assert {r["block"]: r["date"] for r in response.get_json()} == {block: DATES[-1] for block in BLOCKS}
+
+
+@pytest.mark.parametrize("params", [
+    {"date": DATES[0], "from": DATES[1]},
+    {"date": DATES[0], "to": DATES[1], "block": "D2_Bay_1"},
+    {"latest": "1", "date": DATES[0]},
+    {"latest": "1", "from": DATES[0]},
+    {"from": "13/05/2025"},
+])
+def test_endpoint_rejects_conflicting_params(client, params):
+    response = client.get(RESULTS, query_string=params)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+@pytest.mark.parametrize("params", [{"latest": "0"}, {"block": ""}, {"from": "", "to": ""}])
+def test_blank_index_params_read_the_newest_folder(client, params):
+    response = client.get(RESULTS, query_string=params)
+
+    assert response.status_code == 200
+    assert response.headers["X-Irrigation-Source"] == "aggregate"
+    assert {r["date"] for r in response.get_json()} == {DATES[-1]}
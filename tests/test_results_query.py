@@ -0,0 +1,79 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from results_query import MAX_LIMIT, QueryError, ResultsQuery
+
+RECORDS = [
+    {"block": "D2_Bay_1", "priority_score": 0.9, "stress_flag": True, "soil_type": "loam"},
+    {"block": "D2_Bay_2", "priority_score": 0.2, "stress_flag": False, "soil_type": "sand"},
+    {"block": "D2_Bay_3", "priority_score": None, "stress_flag": False, "soil_type": "loam"},
+    {"block": "D2_Bay_4", "priority_score": 0.5, "stress_flag": True, "soil_type": "sand"},
+]
+
+
+def _query(**params):
+    return ResultsQuery.from_args(MultiDict(params))
+
+
+def _blocks(page):
+    return [record["block"] for record in page]
+
+
+def test_equality_predicates_on_known_fields():
+    page, total = _query(stress_flag="true", soil_type="sand").apply(RECORDS)
+    assert _blocks(page) == ["D2_Bay_4"]
+    assert total == 1
+
+
+def test_comparison_predicates_skip_nulls():
+    page, _ = _query(priority_score__gte="0.5").apply(RECORDS)
+    assert _blocks(page) == ["D2_Bay_1", "D2_Bay_4"]
+
+    page, _ = _query(priority_score__eq="null").apply(RECORDS)
+    assert _blocks(page) == ["D2_Bay_3"]
+
+
+def test_unknown_params_are_not_predicates():
+    query = _query(v="2", _="1700000000")
+    assert query.is_trivial()
+    assert _blocks(query.apply(RECORDS)[0]) == _blocks(RECORDS)
+
+
+@pytest.mark.parametrize("params", [{"priority_score__approx": "1"}, {"soil_type__gt": "loam"}])
+def test_bad_predicates_raise(params):
+    with pytest.raises(QueryError):
+        _query(**params)
+
+
+def test_sort_descending_with_missing_values_last():
+    page, _ = _query(sort="-priority_score").apply(RECORDS)
+    assert _blocks(page) == ["D2_Bay_1", "D2_Bay_4", "D2_Bay_2", "D2_Bay_3"]
+
+    page, _ = _query(sort="priority_score").apply(RECORDS)
+    assert _blocks(page) == ["D2_Bay_2", "D2_Bay_4", "D2_Bay_1", "D2_Bay_3"]
+
+
+def test_sort_on_several_keys():
+    page, _ = _query(sort="soil_type,-block").apply(RECORDS)
+    assert _blocks(page) == ["D2_Bay_3", "D2_Bay_1", "D2_Bay_4", "D2_Bay_2"]
+
+
+def test_pagination_reports_the_full_total():
+    query = _query(sort="block", limit="2", offset="1", fields="block")
+    page, total = query.apply(RECORDS)
+    assert page == [{"block": "D2_Bay_2"}, {"block": "D2_Bay_3"}]
+    assert total == 4
+
+
+@pytest.mark.parametrize("params", [{"limit": "-1"}, {"offset": "x"}, {"limit": str(MAX_LIMIT + 1)}])
+def test_bad_pagination_raises(params):
+    with pytest.raises(QueryError):
+        _query(**params)
+
+
+def test_iter_page_filters_and_paginates_lazily():
+    query = _query(stress_flag="false", limit="1", fields="block")
+    assert list(query.iter_page(iter(RECORDS))) == [{"block": "D2_Bay_2"}]
+
+    with pytest.raises(QueryError):
+        list(_query(sort="block").iter_page(iter(RECORDS)))
@@ -0,0 +1,136 @@
+import gzip
+import json
+
+import pytest
+
+import server
+from conftest import make_record
+from outputs import AGGREGATE_FILE
+from results_cache import MIN_COMPRESS_SIZE, ResultsCache
+
+DATE = "2025-05-17"
+RESULTS = "/api/irrigation-results"
+
+
+@pytest.fixture
+def client(tree, monkeypatch):
+    monkeypatch.setattr(server, "OUTPUTS_DIR", tree.root)
+    monkeypatch.setattr(server, "results_cache", ResultsCache())
+    records = [make_record(f"D2_Bay_{i}", DATE, priority_score=i / 20) for i in range(1, 21)]
+    tree.write_date(DATE, records)
+    return server.app.test_client()
+
+
+def test_results_body_and_validators(client):
+    response = client.get(RESULTS)
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == 20
+    assert response.headers["X-Irrigation-Source"] == "aggregate"
+    assert response.headers["ETag"]
+    assert response.headers["Last-Modified"]
+    assert "Accept-Encoding" in response.headers["Vary"]
+
+
+def test_if_none_match_returns_304(client):
+    etag = client.get(RESULTS).headers["ETag"]
+
+    response = client.get(RESULTS, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_if_modified_since_returns_304(client):
+    last_modified = client.get(RESULTS).headers["Last-Modified"]
+
+    response = client.get(RESULTS, headers={"If-Modified-Since": last_modified})
+
+    assert response.status_code == 304
+
+
+def test_changed_folder_misses_the_old_etag(client, tree):
+    etag = client.get(RESULTS).headers["ETag"]
+
+    tree.write_aggregate(DATE, [make_record("D2_Bay_1", DATE)], mtime_offset=5)
+    response = client.get(RESULTS, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == 1
+
+
+def test_gzip_is_negotiated(client):
+    plain = client.get(RESULTS)
+    assert len(plain.data) >= MIN_COMPRESS_SIZE
+
+    response = client.get(RESULTS, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(response.data) == plain.data
+    assert response.headers["ETag"] != plain.headers["ETag"]
+    again = client.get(RESULTS, headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_unsupported_encoding_is_sent_uncompressed(client):
+    response = client.get(RESULTS, headers={"Accept-Encoding": "compress, gzip;q=0"})
+
+    assert "Content-Encoding" not in response.headers
+    assert len(response.get_json()) == 20
+
+
+def test_small_bodies_are_not_compressed(client, tree):
+    tree.write_aggregate(DATE, [make_record("D2_Bay_1", DATE)], mtime_offset=5)
+
+    response = client.get(RESULTS, headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_query_filters_sorts_and_paginates(client):
+    response = client.get(RESULTS, query_string={
+        "priority_score__gt": "0.5", "sort": "-priority_score", "limit": "3", "fields": "block,priority_score",
+    })
+
+    assert response.status_code == 200
+    assert response.get_json() == [
+        {"block": "D2_Bay_20", "priority_score": 1.0},
+        {"block": "D2_Bay_19", "priority_score": 0.95},
+        {"block": "D2_Bay_18", "priority_score": 0.9},
+    ]
+    assert response.headers["X-Total-Count"] == "10"
+    assert response.headers["X-Next-Offset"] == "3"
+
+    again = client.get(response.request.full_path, headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_bad_query_is_a_400(client):
+    response = client.get(RESULTS, query_string={"priority_score__approx": "1"})
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_malformed_aggregate_is_served_from_blocks(client, tree):
+    tree.write_raw(DATE, AGGREGATE_FILE, "[{", mtime_offset=5)
+
+    response = client.get(RESULTS)
+
+    assert response.headers["X-Irrigation-Source"] == "blocks"
+    assert response.headers["X-Irrigation-Files"] == "malformed=1, ok=20"
+    assert len(response.get_json()) == 20
+
+
+def test_missing_date_is_an_empty_list(client):
+    response = client.get(RESULTS, query_string={"date": "2024-01-01"})
+
+    assert response.status_code == 200
+    assert response.get_json() == []
+
+
+def test_ndjson_stream(client):
+    response = client.get(RESULTS, query_string={"stream": "1", "fields": "block", "limit": "2"})
+
+    assert response.mimetype == server.NDJSON
+    assert [json.loads(line) for line in response.data.splitlines()] == [{"block": "D2_Bay_1"}, {"block": "D2_Bay_2"}]
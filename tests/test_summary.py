@@ -0,0 +1,121 @@
+from collections import OrderedDict
+
+import pytest
+
+import server
+from conftest import make_record
+from outputs import SUMMARY_CSV
+from results_cache import ResultsCache
+from results_index import ResultsIndex
+from summary import block_prefix, summarize
+
+DATE = "2025-05-17"
+SUMMARY = "/api/irrigation-summary"
+
+
+@pytest.mark.parametrize("block, prefix", [
+    ("D2_Bay_10", "D2_Bay"),
+    ("wash_a", "wash"),
+    ("solo", "solo"),
+    ("_a", "_a"),
+    ("", "unknown"),
+    (None, "unknown"),
+])
+def test_block_prefix(block, prefix):
+    assert block_prefix(block) == prefix
+
+
+def test_summarize_totals_and_groups():
+    records = [
+        make_record("D2_Bay_1", DATE, irrigation_mm=2.0, ndvi=0.5, stress_flag=True),
+        make_record("D2_Bay_2", DATE, irrigation_mm=3.0, ndvi=0.7, soil_type="sand"),
+        make_record("wash_a", DATE, irrigation_mm=None, ndvi=None, crop=None, leaching_risk=True),
+    ]
+
+    summary = summarize(records)
+
+    totals = summary["totals"]
+    assert (totals["blocks"], totals["irrigation_mm"]) == (3, 5.0)
+    assert totals["ndvi_mean"] == pytest.approx(0.6)
+    assert (totals["ndvi_min"], totals["ndvi_max"]) == (0.5, 0.7)
+    assert (totals["stress_flag_count"], totals["leaching_risk_count"], totals["fallback_used_count"]) == (1, 1, 0)
+    assert sorted(summary["by_prefix"]) == ["D2_Bay", "wash"]
+    assert summary["by_prefix"]["D2_Bay"]["irrigation_mm"] == 5.0
+    assert {key: rollup["blocks"] for key, rollup in summary["by_soil_type"].items()} == {"loam": 2, "sand": 1}
+    assert sorted(summary["by_crop"]) == ["citrus", "unknown"]
+
+
+def test_summarize_parses_csv_strings_but_not_booleans():
+    summary = summarize([
+        {"block": "D2_Bay_1", "irrigation_mm": "1.5", "ndvi": "0.8"},
+        {"block": "D2_Bay_2", "irrigation_mm": True, "ndvi": "n/a"},
+    ])
+
+    assert summary["totals"]["irrigation_mm"] == 1.5
+    assert summary["totals"]["ndvi_mean"] == 0.8
+
+
+def test_summarize_nothing():
+    summary = summarize([])
+
+    assert summary["totals"]["blocks"] == 0
+    assert summary["totals"]["ndvi_mean"] is None
+    assert summary["by_prefix"] == {}
+
+
+@pytest.fixture
+def client(tree, tmp_path, monkeypatch):
+    monkeypatch.setattr(server, "OUTPUTS_DIR", tree.root)
+    monkeypatch.setattr(server, "results_cache", ResultsCache())
+    monkeypatch.setattr(server, "results_index", ResultsIndex(str(tmp_path / "index.sqlite3"), tree.root, 0))
+    monkeypatch.setattr(server, "_summary_bodies", OrderedDict())
+    return server.app.test_client()
+
+
+def test_summary_endpoint(client, tree):
+    tree.write_date("2025-05-16", [make_record("D2_Bay_1", "2025-05-16", irrigation_mm=4.0)])
+    tree.write_date(DATE, [make_record(f"D2_Bay_{i}", DATE, irrigation_mm=1.0) for i in range(1, 4)])
+
+    body = client.get(SUMMARY).get_json()
+
+    assert (body["date"], body["source"]) == (DATE, "aggregate")
+    assert body["totals"]["irrigation_mm"] == 3.0
+    assert [(t["date"], t["irrigation_mm"]) for t in body["trends"]] == [("2025-05-16", 4.0), (DATE, 3.0)]
+    assert [t["date"] for t in client.get(SUMMARY, query_string={"from": DATE}).get_json()["trends"]] == [DATE]
+
+
+def test_summary_etag_changes_with_the_folder(client, tree):
+    tree.write_date(DATE, [make_record("D2_Bay_1", DATE, irrigation_mm=1.0)])
+    first = client.get(SUMMARY)
+    assert client.get(SUMMARY, headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+    tree.write_aggregate(DATE, [make_record("D2_Bay_1", DATE, irrigation_mm=6.0)], mtime_offset=5)
+    second = client.get(SUMMARY, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.get_json()["totals"]["irrigation_mm"] == 6.0
+    assert second.get_json()["trends"][0]["irrigation_mm"] == 6.0
+
+
+def test_summary_falls_back_to_the_csv(client, tree):
+    csv = "block,date,ndvi,irrigation_mm,irrigation_minutes\nD2_Bay_1,{0},0.8,0.19,1.1\nD2_Bay_2,{0},0.6,0.31,2.0\n"
+    tree.write_raw(DATE, SUMMARY_CSV, csv.format(DATE))
+
+    body = client.get(SUMMARY).get_json()
+
+    assert body["source"] == "summary_csv"
+    assert body["totals"]["blocks"] == 2
+    assert body["totals"]["irrigation_mm"] == 0.5
+    assert body["totals"]["ndvi_mean"] == pytest.approx(0.7)
+
+    # The CSV is not tracked by the cache, so its body is never reused.
+    tree.write_raw(DATE, SUMMARY_CSV, csv.format(DATE).replace("0.31", "1.31"))
+    assert client.get(SUMMARY).get_json()["totals"]["irrigation_mm"] == 1.5
+
+
+def test_summary_without_outputs(client):
+    body = client.get(SUMMARY).get_json()
+
+    assert (body["date"], body["source"], body["trends"]) == (None, None, [])
+    assert body["totals"]["blocks"] == 0
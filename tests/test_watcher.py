@@ -0,0 +1,103 @@
+import os
+import queue
+import time
+
+import pytest
+
+import server
+from conftest import make_record
+from results_cache import ResultsCache
+from watcher import SUBSCRIBER_QUEUE_SIZE, ResultsWatcher
+
+DATE = "2025-05-17"
+TIMEOUT = 5
+
+
+@pytest.fixture
+def watcher(tree):
+    tree.write_date(DATE, [make_record(f"D2_Bay_{i}", DATE) for i in range(1, 4)], aggregate=False)
+    watcher = ResultsWatcher(ResultsCache(), tree.root, poll_interval=0.2)
+    yield watcher
+    for subscriber in list(watcher._subscribers):
+        watcher.unsubscribe(subscriber)
+
+
+def test_subscribe_takes_a_baseline_snapshot(watcher):
+    subscriber = watcher.subscribe()
+
+    date, records = watcher.snapshot()
+    assert date == DATE
+    assert sorted(r["block"] for r in records) == ["D2_Bay_1", "D2_Bay_2", "D2_Bay_3"]
+    assert subscriber.empty()
+
+
+def test_changed_record_is_published(watcher, tree):
+    subscriber = watcher.subscribe()
+
+    tree.write_block(DATE, make_record("D2_Bay_2", DATE, irrigation_minutes=77.0), mtime_offset=5)
+    message = subscriber.get(timeout=TIMEOUT)
+
+    assert message["date"] == DATE
+    assert [(r["block"], r["irrigation_minutes"]) for r in message["changed"]] == [("D2_Bay_2", 77.0)]
+    assert message["removed"] == []
+
+
+def test_removed_block_is_published(watcher, tree):
+    subscriber = watcher.subscribe()
+
+    os.remove(os.path.join(tree.folder(DATE), "D2_Bay_3_irrigation.json"))
+    message = subscriber.get(timeout=TIMEOUT)
+
+    assert message["changed"] == []
+    assert message["removed"] == [{"block": "D2_Bay_3", "date": DATE}]
+
+
+def test_new_date_folder_is_published_whole(watcher, tree):
+    subscriber = watcher.subscribe()
+
+    tree.write_date("2025-05-18", [make_record(f"D2_Bay_{i}", "2025-05-18") for i in range(1, 3)])
+    message = subscriber.get(timeout=TIMEOUT)
+
+    assert message["date"] == "2025-05-18"
+    assert sorted(r["block"] for r in message["changed"]) == ["D2_Bay_1", "D2_Bay_2"]
+    assert message["removed"] == []
+    assert watcher.snapshot()[0] == "2025-05-18"
+
+
+def test_subscriber_that_falls_behind_is_closed(watcher, tree):
+    subscriber = watcher.subscribe()
+    for _ in range(SUBSCRIBER_QUEUE_SIZE):
+        subscriber.put_nowait({})
+
+    tree.write_block(DATE, make_record("D2_Bay_1", DATE, irrigation_minutes=1.0), mtime_offset=5)
+    deadline = time.monotonic() + TIMEOUT
+    while subscriber in watcher._subscribers and time.monotonic() < deadline:
+        time.sleep(0.05)
+
+    # The backlog is dropped in favour of the sentinel that ends the stream.
+    assert subscriber.get_nowait() is None
+    with pytest.raises(queue.Empty):
+        subscriber.get_nowait()
+
+
+def test_max_subscribers(watcher):
+    watcher.max_subscribers = 2
+    first, second = watcher.subscribe(), watcher.subscribe()
+
+    assert not watcher.has_capacity()
+    assert watcher.subscribe() is None
+
+    watcher.unsubscribe(first)
+    assert watcher.has_capacity()
+    assert watcher.subscribe() is not None
+
+
+def test_stream_endpoint_answers_503_when_full(watcher, monkeypatch):
+    watcher.max_subscribers = 1
+    monkeypatch.setattr(server, "results_watcher", watcher)
+    watcher.subscribe()
+
+    response = server.app.test_client().get("/api/irrigation-results/stream")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(server.SSE_RETRY_SECONDS)
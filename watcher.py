@@ -0,0 +1,178 @@
+"""Single filesystem watcher fanning out block-level deltas to SSE subscribers.
+
+The watcher follows the newest ``Irrigation_Outputs/<date>/`` folder. It wakes
+on inotify events when ``inotify_simple`` is installed and otherwise polls the
+folder's mtimes through the results cache, then publishes only the records
+that changed since its last look.
+"""
+
+import itertools
+import logging
+import os
+import queue
+import threading
+import time
+
+from outputs import latest_date, record_key
+
+try:
+    from inotify_simple import INotify, flags
+except ImportError:  # inotify_simple is optional (and Linux-only); fall back to polling
+    INotify = None
+
+logger = logging.getLogger(__name__)
+
+# A subscriber that falls this many messages behind is disconnected; the
+# browser's EventSource reconnects and the client re-fetches the full results.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class ResultsWatcher:
+    def __init__(self, cache, outputs_dir, poll_interval=2.0, max_subscribers=None):
+        self.cache = cache
+        self.outputs_dir = outputs_dir
+        self.poll_interval = poll_interval
+        self.max_subscribers = max_subscribers  # None for no limit
+        self._subscribers = set()
+        # ``_lock`` guards the subscriber set and the published snapshot only;
+        # reloading the folder happens under ``_check_lock`` so it never stalls
+        # connects and disconnects.
+        self._lock = threading.Lock()
+        self._check_lock = threading.Lock()
+        self._thread = None
+        self._ids = itertools.count(1)
+        self._date = None
+        self._entry = None
+        self._snapshot = {}
+
+    def has_capacity(self):
+        with self._lock:
+            return self._has_capacity()
+
+    def subscribe(self):
+        """Register a subscriber, starting the watcher thread if needed.
+
+        Returns its queue, or None when ``max_subscribers`` are already connected.
+        """
+        subscriber = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            if not self._has_capacity():
+                return None
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="irrixa-watcher", daemon=True)
+                self._thread.start()
+        if self._entry is None:
+            # Baseline, so the first message is a real delta
+            with self._check_lock:
+                if self._entry is None:
+                    self._check()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def _has_capacity(self):
+        return self.max_subscribers is None or len(self._subscribers) < self.max_subscribers
+
+    def snapshot(self):
+        with self._lock:
+            return self._date, list(self._snapshot.values())
+
+    def _run(self):
+        inotify = _open_inotify()
+        watches = {}
+        try:
+            while True:
+                if inotify is not None:
+                    self._update_watches(inotify, watches)
+                    # Coalesce the burst of writes from one pipeline run.
+                    inotify.read(timeout=int(self.poll_interval * 1000), read_delay=200)
+                else:
+                    time.sleep(self.poll_interval)
+                with self._lock:
+                    if not self._subscribers:
+                        self._thread = None
+                        return
+                with self._check_lock:
+                    self._check()
+        except Exception:
+            logger.exception("Results watcher stopped")
+            with self._lock:
+                self._thread = None
+        finally:
+            if inotify is not None:
+                inotify.close()
+
+    def _update_watches(self, inotify, watches):
+        wanted = {self.outputs_dir: flags.CREATE | flags.MOVED_TO | flags.ONLYDIR}
+        if self._date is not None:
+            wanted[os.path.join(self.outputs_dir, self._date)] = (
+                flags.CLOSE_WRITE | flags.MOVED_TO | flags.MOVED_FROM | flags.DELETE | flags.CREATE
+            )
+        for path in set(watches) - set(wanted):
+            try:
+                inotify.rm_watch(watches.pop(path))
+            except OSError:
+                pass
+        for path, mask in wanted.items():
+            if path not in watches:
+                try:
+                    watches[path] = inotify.add_watch(path, mask)
+                except OSError:
+                    pass
+
+    def _check(self):
+        """Refresh the newest folder through the cache and publish what changed.
+
+        Called with ``_check_lock`` held; the load and the diff run outside ``_lock``.
+        """
+        date = latest_date(self.outputs_dir)
+        if date is None:
+            return
+        entry = self.cache.get(date, os.path.join(self.outputs_dir, date), count=False)
+        if entry is self._entry:
+            return
+
+        current = {record_key(record): record for record in entry.records}
+        if date == self._date:
+            changed = [record for key, record in current.items() if self._snapshot.get(key) != record]
+            removed = [{"block": key[0], "date": key[1]} for key in self._snapshot if key not in current]
+        else:
+            # A new date folder: its records are all new, the old ones are not removed.
+            changed, removed = list(current.values()), []
+        first = self._entry is None
+        with self._lock:
+            self._date, self._entry, self._snapshot = date, entry, current
+            subscribers = list(self._subscribers)
+        if first or not (changed or removed):
+            return
+
+        message = {"id": next(self._ids), "date": date, "changed": changed, "removed": removed}
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(message)
+            except queue.Full:
+                self.unsubscribe(subscriber)
+                _close(subscriber)
+
+
+def _close(subscriber):
+    """Replace whatever is queued with the None sentinel that ends the stream."""
+    while True:
+        try:
+            subscriber.get_nowait()
+        except queue.Empty:
+            break
+    subscriber.put_nowait(None)
+
+
+def _open_inotify():
+    if INotify is None:
+        return None
+    try:
+        return INotify()
+    except OSError as e:
+        logger.warning("inotify unavailable, polling instead: %s", e)
+        return None
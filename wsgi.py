@@ -0,0 +1,12 @@
+"""Production WSGI entry point.
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+The newest output folder and the index are warmed up at import, i.e. once in
+the gunicorn master before workers fork (``preload_app``), so the first
+requests do not pay for a cold cache.
+"""
+
+from server import app, warm_up
+
+warm_up()